@@ -5,7 +5,7 @@ from datetime import datetime
 import shutil
 from utils.database import Database
 from utils.geolocation import extract_gps_data
-from utils.image_processing import calculate_tree_dimensions, process_image
+from utils.image_processing import process_images as classify_and_measure
 from utils.plant_id import identify_tree_type, resize_image
 from utils.web_ui import start_web_interface
 from dotenv import load_dotenv
@@ -65,34 +65,35 @@ def process_images(image_dir, model, device, force_refresh=False):
         # Initialize database
         db = Database()
         
-        # Get list of images
-        image_files = [f for f in os.listdir(image_dir) 
-                      if f.lower().endswith(('.png', '.jpg', '.jpeg'))]
+        # Get list of images that are new or changed since the last run
+        image_paths = db.filter_needs_processing(image_dir, force_refresh)
         
-        logging.info(f"Found {len(image_files)} images to process")
+        logging.info(f"Found {len(image_paths)} images to process")
         
-        # Process each image
-        for i, image_file in enumerate(image_files, 1):
-            image_path = os.path.join(image_dir, image_file)
-            
-            # Check if image needs processing
-            if not force_refresh and db.get_tree_by_image_path(image_file):
-                logging.info(f"Skipping {image_file} - already processed")
-                continue
-                
-            logging.info(f"Processing image {i}/{len(image_files)}: {image_file}")
-            
-            # Process image
-            result = process_image(image_path, model, device)
+        # Classify in batches on the model, then measure each image
+        results = classify_and_measure(image_paths, model, device)
+        
+        for image_path, result in zip(image_paths, results):
+            image_file = os.path.basename(image_path)
             
             if result:
-                # Add to database
-                db.add_tree(
-                    image_path=image_file,
-                    tree_type=result['tree_type'],
-                    height_m=result['height_m'],
-                    width_m=result['width_m']
-                )
+                existing = db.get_tree_by_image_path(image_file)
+                if existing:
+                    # Image was modified since it was last processed
+                    db.update_tree(
+                        tree_id=existing[0],
+                        tree_type=result['tree_type'],
+                        height_m=result['height_m'],
+                        width_m=result['width_m']
+                    )
+                else:
+                    # Add to database
+                    db.add_tree(
+                        image_path=image_file,
+                        tree_type=result['tree_type'],
+                        height_m=result['height_m'],
+                        width_m=result['width_m']
+                    )
                 logging.info(f"Successfully processed {image_file}")
             else:
                 logging.error(f"Failed to process {image_file}")
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+from torchvision.io import ImageReadMode, decode_jpeg, read_file
+
+from utils import tensor_transforms
+from utils.image_io import load_bgr
+from utils.tensor_transforms import read_rgb
+
+
+def _write_oriented_jpeg(path, orientation):
+    """Write a 40x80 (HxW) JPEG with a bright top-left corner and an EXIF orientation"""
+    pixels = np.zeros((40, 80, 3), np.uint8)
+    pixels[:10, :20] = 255
+    exif = Image.Exif()
+    exif[0x0112] = orientation
+    Image.fromarray(pixels).save(path, quality=95, exif=exif)
+    return str(path)
+
+
+def test_read_rgb_rotates_orientation_6_upright(tmp_path):
+    image_path = _write_oriented_jpeg(tmp_path / 'rotated.jpg', 6)
+
+    image = read_rgb(image_path)
+
+    assert tuple(image.shape) == (3, 80, 40)
+    assert tuple(image.shape[1:]) == load_bgr(image_path).shape[:2]
+
+
+@pytest.mark.parametrize('orientation', range(1, 9))
+def test_gpu_orientation_fixes_match_the_cpu_decoder(tmp_path, orientation):
+    # The CUDA decoder ignores EXIF, so its output is fixed up afterwards;
+    # the same fix applied to an unrotated CPU decode must match torchvision's
+    image_path = _write_oriented_jpeg(tmp_path / f'o{orientation}.jpg', orientation)
+    unrotated = decode_jpeg(read_file(image_path), mode=ImageReadMode.RGB)
+
+    fix = tensor_transforms._ORIENTATION_FIXES.get(orientation)
+    fixed = fix(unrotated) if fix else unrotated
+
+    assert torch.equal(fixed, read_rgb(image_path))
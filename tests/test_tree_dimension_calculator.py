@@ -0,0 +1,69 @@
+import os
+import shutil
+import time
+
+import cv2
+import numpy as np
+
+from utils import tree_dimension_calculator as tdc
+
+
+def _write_tree_image(path, offset):
+    """Write a grey frame with a green trunk-and-crown blob placed by ``offset``"""
+    image = np.full((480, 360, 3), 128, np.uint8)
+    cv2.rectangle(image, (150 + offset, 260), (190 + offset, 440), (40, 160, 40), -1)
+    cv2.circle(image, (170 + offset, 200), 80 + offset, (30, 180, 30), -1)
+    assert cv2.imwrite(str(path), image)
+    return str(path)
+
+
+def _analyzed_path(image_path):
+    return os.path.splitext(image_path)[0] + '_analyzed.jpg'
+
+
+def _wait_for(path, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return os.path.exists(path)
+
+
+def test_calculate_many_after_parent_calculation_writes_every_output(tmp_path):
+    # Use the calculator in the parent first so its writer pool and OpenCV state exist
+    parent_image = _write_tree_image(tmp_path / 'parent.jpg', 0)
+    height, width = tdc.TreeDimensionCalculator().calculate_tree_dimensions(parent_image)
+    assert height is not None and width is not None
+
+    # Distinct contents, so no result comes from the memo instead of a worker
+    image_paths = [
+        _write_tree_image(tmp_path / f'tree_{i}.jpg', i + 1)
+        for i in range(4)
+    ]
+    results = tdc.calculate_many(image_paths, max_workers=2)
+
+    assert len(results) == len(image_paths)
+    assert all(height is not None for height, _ in results)
+    # Workers flush their writes before exiting, so every file is complete once the pool is gone
+    for image_path in image_paths:
+        annotated = cv2.imread(_analyzed_path(image_path))
+        assert annotated is not None, image_path
+        assert annotated.shape == cv2.imread(image_path).shape
+    assert _wait_for(_analyzed_path(parent_image))
+
+
+def test_identical_image_reuses_measurement_and_writes_its_own_output(tmp_path):
+    first = _write_tree_image(tmp_path / 'first.jpg', 7)
+    second = str(tmp_path / 'second.jpg')
+    shutil.copyfile(first, second)
+
+    calculator = tdc.TreeDimensionCalculator()
+    assert calculator.calculate_tree_dimensions(first) == calculator.calculate_tree_dimensions(second)
+    assert _wait_for(_analyzed_path(first))
+    assert _wait_for(_analyzed_path(second))
+
+
+def test_failed_annotated_write_is_logged(tmp_path, caplog):
+    output_path = str(tmp_path / 'missing_dir' / 'tree_analyzed.jpg')
+
+    assert tdc._write_annotated(output_path, np.zeros((8, 8, 3), np.uint8)) is False
+    assert output_path in caplog.text
@@ -0,0 +1,53 @@
+import queue
+
+import pytest
+
+from utils import web_ui
+from utils.database import Database
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    # The app opens tree_analysis.db in the working directory
+    monkeypatch.chdir(tmp_path)
+    db = Database()
+    db.add_tree('/photos/oak.jpg', 'Oak', 12.3456789, 10.123, 0.9, 'Reference object', 0.8,
+                {'latitude': 51.12345678, 'longitude': -0.98765432, 'altitude': 10})
+    db.add_tree('/photos/pine.jpg', 'Pine', 7.0, 3.0)
+    db.close()
+
+    _reset_web_state()
+    yield web_ui.app.test_client()
+    _reset_web_state()
+
+
+def _reset_web_state():
+    """Drop pooled connections and cached frames left over from another database"""
+    web_ui._trees_df.cache_clear()
+    while True:
+        try:
+            web_ui._DB_POOL.get_nowait().close()
+        except queue.Empty:
+            break
+
+
+def test_csv_export_rounds_like_the_xlsx_formats(client):
+    response = client.get('/export?fmt=csv')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines[0] == 'ID,Image Name,Tree Type,Height (m),Width (m),Latitude,Longitude,Processed Date'
+    oak = lines[1].split(',')
+    assert oak[1:7] == ['oak.jpg', 'Oak', '12.35', '10.12', '51.123457', '-0.987654']
+    pine = lines[2].split(',')
+    # Missing coordinates stay blank rather than 0
+    assert pine[1:7] == ['pine.jpg', 'Pine', '7.0', '3.0', '', '']
+
+
+def test_csv_export_is_chosen_from_the_accept_header(client):
+    response = client.get('/export', headers={'Accept': 'text/csv'})
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert 'Accept' in response.vary
@@ -4,8 +4,15 @@ from PIL import Image, ExifTags
 import math
 import os
 import requests
+from requests.adapters import HTTPAdapter
 from io import BytesIO
 import logging
+from .image_io import load_bgr
+
+# Shared session so image URLs on the same host reuse their connections
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=8, pool_maxsize=16))
+_SESSION.mount('http://', HTTPAdapter(pool_connections=8, pool_maxsize=16))
 
 class AdvancedTreeMeasurer:
     def __init__(self):
@@ -233,10 +240,10 @@ class AdvancedTreeMeasurer:
         # Adaptive masking
         mask = cv2.inRange(hsv, lower_green, upper_green)
         
-        # Morphological refinement
+        # Morphological refinement, reusing the mask as the output buffer
         kernel = np.ones((5,5), np.uint8)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=2)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=1)
+        cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, dst=mask, iterations=2)
+        cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, dst=mask, iterations=1)
         
         # Find contours and select the best candidate
         contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -274,15 +281,23 @@ class AdvancedTreeMeasurer:
         # Like MiDaS or similar
         return None
     
-    def calculate_dimensions(self, image_path):
-        """Main function with enhanced accuracy"""
+    def calculate_dimensions(self, image_path, image=None):
+        """Main function with enhanced accuracy
+        
+        Pass an already decoded BGR ``image`` to skip reading image_path again;
+        it is copied before annotating, the caller's array is never drawn on.
+        """
         try:
-            # Load image
-            if image_path.startswith('http'):
-                response = requests.get(image_path)
+            # Load image unless the caller already decoded it
+            if image is None and image_path.startswith('http'):
+                response = _SESSION.get(image_path, timeout=(5, 30))
+                response.raise_for_status()
                 image = cv2.imdecode(np.frombuffer(response.content, np.uint8), -1)
+            elif image is None:
+                image = load_bgr(image_path)
             else:
-                image = cv2.imread(image_path)
+                # Annotations are drawn on the image, keep them off the caller's array
+                image = image.copy()
             
             if image is None:
                 raise ValueError("Could not load image")
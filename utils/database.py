@@ -15,15 +15,52 @@ The database schema includes:
 
 import sqlite3
 import os
+import threading
 from datetime import datetime
 import logging
 
+# File extensions recognised as tree images
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# Column order of the trees table, as returned by SELECT *
+TREE_COLUMNS = (
+    'id', 'image_path', 'tree_type', 'type_confidence', 'height_m', 'width_m',
+    'measurement_method', 'measurement_confidence', 'latitude', 'longitude',
+    'altitude', 'timestamp'
+)
+
+# SQLite's default limit on host parameters in a single statement
+_SQLITE_MAX_PARAMS = 999
+
+# Bytes of the database file SQLite may memory-map for reads (256 MB)
+_SQLITE_MMAP_SIZE = 256 * 1024 * 1024
+
+# One idle connection per database file whose PRAGMA data_version counts the
+# commits made by every other connection, in this process or any other
+_WATCHERS = {}
+_WATCHER_LOCK = threading.Lock()
+
+def _commit_counter(db_path):
+    """Return a counter that changes whenever any connection commits to db_path"""
+    db_path = os.path.abspath(db_path)
+    with _WATCHER_LOCK:
+        conn = _WATCHERS.get(db_path)
+        if conn is None:
+            conn = sqlite3.connect(db_path, check_same_thread=False)
+            _WATCHERS[db_path] = conn
+        return conn.execute('PRAGMA data_version').fetchone()[0]
+
 class Database:
     """Database management class for tree analysis data."""
     
-    def __init__(self, db_path='tree_analysis.db'):
-        """Initialize database connection and create tables if they don't exist."""
+    def __init__(self, db_path='tree_analysis.db', check_same_thread=True):
+        """Initialize database connection and create tables if they don't exist.
+        
+        Pass check_same_thread=False for connections that are pooled and
+        handed between threads, one thread at a time.
+        """
         self.db_path = db_path
+        self.check_same_thread = check_same_thread
         self.conn = None
         self.cursor = None
         self.connect()
@@ -32,8 +69,15 @@ class Database:
     def connect(self):
         """Establish database connection."""
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=self.check_same_thread)
+            # Rows can be read by column name as well as by position
+            self.conn.row_factory = sqlite3.Row
             self.cursor = self.conn.cursor()
+            # WAL lets readers run alongside a writer, NORMAL sync is safe with
+            # WAL, and memory-mapped pages are read without copying
+            self.cursor.execute('PRAGMA journal_mode=WAL')
+            self.cursor.execute('PRAGMA synchronous=NORMAL')
+            self.cursor.execute(f'PRAGMA mmap_size={_SQLITE_MMAP_SIZE}')
         except Exception as e:
             logging.error(f"Database connection error: {str(e)}")
             raise
@@ -57,6 +101,11 @@ class Database:
                     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
+            # Lookups by image path read the timestamp straight from the index
+            self.cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_trees_image_path
+                ON trees (image_path, timestamp)
+            ''')
             self.conn.commit()
         except Exception as e:
             logging.error(f"Error creating tables: {str(e)}")
@@ -132,6 +181,80 @@ class Database:
             logging.error(f"Error retrieving tree record: {str(e)}")
             return None
     
+    def filter_needs_processing(self, directory, force_refresh=False):
+        """
+        Get the images in a directory that are new or modified since they were processed.
+        
+        The directory is scanned once with os.scandir and the stored timestamps
+        are fetched with a single IN (...) query per chunk of file names,
+        instead of one stat call and one lookup per image.
+        
+        Args:
+            directory (str): Directory containing the tree images
+            force_refresh (bool, optional): Return every image regardless of stored records
+            
+        Returns:
+            list: Paths of the images that need processing
+        """
+        mtimes = {}
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    mtimes[entry.name] = (entry.path, entry.stat().st_mtime)
+        
+        if force_refresh or not mtimes:
+            return [path for path, _ in mtimes.values()]
+        
+        processed = {}
+        try:
+            names = list(mtimes)
+            for start in range(0, len(names), _SQLITE_MAX_PARAMS):
+                chunk = names[start:start + _SQLITE_MAX_PARAMS]
+                placeholders = ', '.join('?' * len(chunk))
+                self.cursor.execute(f'''
+                    SELECT image_path, strftime('%s', MAX(timestamp))
+                    FROM trees
+                    WHERE image_path IN ({placeholders})
+                    GROUP BY image_path
+                ''', chunk)
+                processed.update(self.cursor.fetchall())
+        except Exception as e:
+            logging.error(f"Error checking processed images: {str(e)}")
+            return [path for path, _ in mtimes.values()]
+        
+        # Stored timestamps are whole UTC epoch seconds, so compare at that resolution
+        return [
+            path for name, (path, mtime) in mtimes.items()
+            if name not in processed or int(mtime) > int(processed[name] or 0)
+        ]
+    
+    def data_version(self):
+        """
+        Cheap token that changes whenever the database contents change.
+        
+        The commit counter of a watcher connection changes on every commit
+        from any other connection, however close together. The modification
+        time, size and inode of the database file and its write-ahead log
+        also catch a file replaced on disk. An empty WAL counts as missing:
+        SQLite creates one whenever a connection opens and deletes it when
+        the last one closes, without any data changing.
+        
+        Returns:
+            tuple: (commit counter, database stat, WAL stat), where each stat
+            is (mtime in nanoseconds, size, inode) and zeros if missing
+        """
+        version = [_commit_counter(self.db_path)]
+        for path in (self.db_path, self.db_path + '-wal'):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+            if stat is None or not stat.st_size:
+                version.append((0, 0, 0))
+            else:
+                version.append((stat.st_mtime_ns, stat.st_size, stat.st_ino))
+        return tuple(version)
+    
     def get_all_trees(self):
         """
         Get all tree records.
@@ -226,10 +349,16 @@ class Database:
             self.conn.rollback()
             raise
     
-    def __del__(self):
-        """Close database connection on object destruction."""
+    def close(self):
+        """Close the database connection."""
         if self.conn:
             self.conn.close()
+            self.conn = None
+            self.cursor = None
+    
+    def __del__(self):
+        """Close database connection on object destruction."""
+        self.close()
 
 # Create a singleton instance
 _db = None
@@ -1,13 +1,20 @@
 import os
-import urllib.request
 import logging
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+# Shared session so downloads from the same host reuse the TLS connection
+_SESSION = requests.Session()
 
 def download_cascade(url, filename):
     """Download a Haar cascade file if it doesn't exist."""
     try:
         if not os.path.exists(filename):
             logging.info(f"Downloading {filename}...")
-            urllib.request.urlretrieve(url, filename)
+            response = _SESSION.get(url, timeout=(5, 30))
+            response.raise_for_status()
+            with open(filename, 'wb') as f:
+                f.write(response.content)
             logging.info(f"Successfully downloaded {filename}")
         else:
             logging.info(f"{filename} already exists")
@@ -25,10 +32,11 @@ def main():
         'haarcascade_fullbody.xml': 'https://raw.githubusercontent.com/opencv/opencv/master/data/haarcascades/haarcascade_fullbody.xml'
     }
     
-    # Download each cascade file
-    for filename, url in cascades.items():
-        filepath = os.path.join(os.path.dirname(__file__), filename)
-        download_cascade(url, filepath)
+    # Download all cascade files concurrently
+    with ThreadPoolExecutor(max_workers=len(cascades)) as executor:
+        for filename, url in cascades.items():
+            filepath = os.path.join(os.path.dirname(__file__), filename)
+            executor.submit(download_cascade, url, filepath)
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
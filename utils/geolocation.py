@@ -1,17 +1,16 @@
 from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut
-from PIL import Image
-from PIL.ExifTags import TAGS, GPSTAGS
+import exifread
+import numpy as np
 import os
 
 def get_exif_data(image_path):
-    """Extract EXIF data from image"""
+    """Extract the EXIF tags needed for GPS lookup from image"""
     try:
-        image = Image.open(image_path)
-        exif = image._getexif()
-        if exif is None:
-            return None
-        return {TAGS.get(tag, tag): value for tag, value in exif.items()}
+        # Parse only the header and stop once the GPS coordinates have been read
+        with open(image_path, 'rb') as f:
+            tags = exifread.process_file(f, details=False, stop_tag='GPS GPSLongitude')
+        return tags or None
     except Exception as e:
         print(f"Error extracting EXIF data: {str(e)}")
         return None
@@ -23,37 +22,43 @@ def convert_to_degrees(value):
     s = float(value[2])
     return d + (m / 60.0) + (s / 3600.0)
 
+def convert_to_degrees_batch(values, refs=None, positive_ref="N"):
+    """
+    Convert many GPS coordinates to degrees in a single vectorized step.
+
+    Args:
+        values: (N, 3) array-like of (degrees, minutes, seconds)
+        refs (sequence, optional): Hemisphere reference per coordinate
+        positive_ref (str): Reference that keeps the value positive ("N" or "E")
+
+    Returns:
+        numpy.ndarray: Coordinates in decimal degrees
+    """
+    arr = np.asarray(values, dtype=np.float64).reshape(-1, 3)
+    degrees = arr[:, 0] + arr[:, 1] / 60.0 + arr[:, 2] / 3600.0
+    if refs is not None:
+        degrees = np.where(np.asarray(refs) == positive_ref, degrees, -degrees)
+    return degrees
+
 def extract_gps_data(image_path):
     """Extract GPS coordinates from image EXIF data"""
     try:
         print(f"\nExtracting GPS data from: {image_path}")
-        exif = get_exif_data(image_path)
-        if not exif:
-            return None
-
-        gps_info = {}
-        for key, value in exif.items():
-            decoded = TAGS.get(key, key)
-            if decoded == "GPSInfo":
-                print(f"GPS Info found: {value}")
-                for t in value.keys():
-                    sub_decoded = GPSTAGS.get(t, t)
-                    gps_info[sub_decoded] = value[t]
-
-        if not gps_info:
+        tags = get_exif_data(image_path)
+        if not tags:
             return None
 
         lat = None
         lon = None
 
-        if "GPSLatitude" in gps_info and "GPSLatitudeRef" in gps_info:
-            lat = convert_to_degrees(gps_info["GPSLatitude"])
-            if gps_info["GPSLatitudeRef"] != "N":
+        if "GPS GPSLatitude" in tags and "GPS GPSLatitudeRef" in tags:
+            lat = convert_to_degrees(tags["GPS GPSLatitude"].values)
+            if tags["GPS GPSLatitudeRef"].values != "N":
                 lat = -lat
 
-        if "GPSLongitude" in gps_info and "GPSLongitudeRef" in gps_info:
-            lon = convert_to_degrees(gps_info["GPSLongitude"])
-            if gps_info["GPSLongitudeRef"] != "E":
+        if "GPS GPSLongitude" in tags and "GPS GPSLongitudeRef" in tags:
+            lon = convert_to_degrees(tags["GPS GPSLongitude"].values)
+            if tags["GPS GPSLongitudeRef"].values != "E":
                 lon = -lon
 
         if lat is not None and lon is not None:
@@ -65,6 +70,51 @@ def extract_gps_data(image_path):
         print(f"Error extracting GPS data: {str(e)}")
         return None
 
+def extract_gps_data_batch(image_paths):
+    """
+    Extract GPS coordinates for many images.
+
+    The raw EXIF values are gathered first and converted with a single
+    convert_to_degrees_batch call per axis.
+
+    Args:
+        image_paths (list): Paths to the image files
+
+    Returns:
+        list: (latitude, longitude) tuple or None for each image, in input order
+    """
+    found = []
+    lat_values, lat_refs = [], []
+    lon_values, lon_refs = [], []
+
+    for i, image_path in enumerate(image_paths):
+        tags = get_exif_data(image_path)
+        if not tags:
+            continue
+        try:
+            lat = [float(v) for v in tags["GPS GPSLatitude"].values]
+            lon = [float(v) for v in tags["GPS GPSLongitude"].values]
+            lat_ref = tags["GPS GPSLatitudeRef"].values
+            lon_ref = tags["GPS GPSLongitudeRef"].values
+        except (KeyError, TypeError, ValueError, ZeroDivisionError):
+            continue
+        if len(lat) != 3 or len(lon) != 3:
+            continue
+
+        found.append(i)
+        lat_values.append(lat)
+        lat_refs.append(lat_ref)
+        lon_values.append(lon)
+        lon_refs.append(lon_ref)
+
+    results = [None] * len(image_paths)
+    if found:
+        lats = convert_to_degrees_batch(lat_values, lat_refs, "N")
+        lons = convert_to_degrees_batch(lon_values, lon_refs, "E")
+        for i, lat, lon in zip(found, lats.tolist(), lons.tolist()):
+            results[i] = (lat, lon)
+    return results
+
 def get_location_from_image(image_path):
     """
     Extract location from image metadata.
@@ -0,0 +1,106 @@
+"""
+Image Loading Module for Tree Analysis Application
+
+This module decodes image files into the BGR numpy arrays used by the
+OpenCV-based measurement code.
+
+Files are read into memory in one go and decoded from the buffer. JPEGs are
+decoded with libjpeg-turbo through PyTurboJPEG when it is installed, which is
+roughly twice as fast as OpenCV for camera images. Other formats, and
+environments without PyTurboJPEG, are decoded with cv2.imdecode.
+
+Dependencies:
+    - cv2: Image decoding fallback
+    - turbojpeg (optional): Fast JPEG decoding
+"""
+
+import logging
+from io import BytesIO
+import cv2
+import numpy as np
+from PIL import Image
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+    _TJ = TurboJPEG()
+except Exception:
+    # Either the package or the libturbojpeg shared library is unavailable
+    _TJ = None
+
+# JPEG files start with the SOI marker
+_JPEG_MAGIC = b'\xff\xd8'
+
+# EXIF orientation tag and the transform that brings each value upright
+_ORIENTATION_TAG = 0x0112
+_ORIENTATION_FIXES = {
+    2: lambda img: cv2.flip(img, 1),
+    3: lambda img: cv2.rotate(img, cv2.ROTATE_180),
+    4: lambda img: cv2.flip(img, 0),
+    5: cv2.transpose,
+    6: lambda img: cv2.rotate(img, cv2.ROTATE_90_CLOCKWISE),
+    7: lambda img: cv2.flip(cv2.transpose(img), -1),
+    8: lambda img: cv2.rotate(img, cv2.ROTATE_90_COUNTERCLOCKWISE)
+}
+
+def exif_orientation(data):
+    """
+    Read the EXIF orientation of an encoded image.
+
+    Args:
+        data: Encoded file contents, any object supporting the buffer protocol
+
+    Returns:
+        int: Orientation tag value, 1 (upright) when absent or unreadable
+    """
+    try:
+        # Image.open only parses the header here, the pixels are never decoded
+        with Image.open(BytesIO(data)) as img:
+            return img.getexif().get(_ORIENTATION_TAG, 1)
+    except Exception:
+        return 1
+
+def _apply_exif_orientation(image, data):
+    """Rotate a decoded JPEG upright, as cv2.imread does"""
+    fix = _ORIENTATION_FIXES.get(exif_orientation(data))
+    return fix(image) if fix else image
+
+def load_bgr(image_path):
+    """
+    Load an image file as a BGR array, rotated upright by its EXIF orientation.
+
+    The file is read with a single sequential read and decoded from memory,
+    which avoids the many small reads cv2.imread issues on network storage.
+
+    Args:
+        image_path (str): Path to the image file
+
+    Returns:
+        numpy.ndarray: BGR image, or None if it could not be read or decoded
+    """
+    try:
+        data = np.fromfile(image_path, dtype=np.uint8)
+    except OSError as e:
+        logging.error(f"Could not read image {image_path}: {str(e)}")
+        return None
+    if data.size == 0:
+        return None
+    return decode_bgr(data, image_path)
+
+def decode_bgr(data, image_path=''):
+    """
+    Decode an encoded image already in memory as a BGR array.
+
+    Args:
+        data (numpy.ndarray): Encoded file contents as a uint8 array
+        image_path (str): Source path, only used in log messages
+
+    Returns:
+        numpy.ndarray: BGR image, or None if it could not be decoded
+    """
+    if _TJ is not None and data[:2].tobytes() == _JPEG_MAGIC:
+        try:
+            image = _TJ.decode(data, pixel_format=TJPF_BGR)
+            return _apply_exif_orientation(image, data)
+        except Exception as e:
+            logging.warning(f"Fast decode failed for {image_path}, using OpenCV: {str(e)}")
+    return cv2.imdecode(data, cv2.IMREAD_COLOR)
@@ -1,143 +1,264 @@
+import os
 import cv2
 import numpy as np
 import torch
-import torchvision.transforms as transforms
-from PIL import Image
+from torch.utils.data import Dataset, DataLoader
 import logging
 from .advanced_tree_measurer import AdvancedTreeMeasurer
+from .image_io import load_bgr
+from .plant_id import identify_tree_type
+from .tensor_transforms import normalize_batch, read_rgb, resize
 
 # Initialize the advanced tree measurer
 tree_measurer = AdvancedTreeMeasurer()
 
-def preprocess_image(image_path):
+# Built once at import instead of per image
+_RESIZE = resize((224, 224))
+
+# HSV bounds for reference objects, uint8 to match what cv2.inRange expects
+# Cars (typically dark gray/black)
+_CAR_LOWER = np.array([0, 0, 0], np.uint8)
+_CAR_UPPER = np.array([180, 30, 100], np.uint8)
+# People (skin tones)
+_SKIN_LOWER = np.array([0, 20, 70], np.uint8)
+_SKIN_UPPER = np.array([20, 255, 255], np.uint8)
+
+# (name, lower HSV, upper HSV, width in meters, height in meters)
+_REF_RANGES = (
+    ('car', _CAR_LOWER, _CAR_UPPER, 1.8, 1.5),
+    ('person', _SKIN_LOWER, _SKIN_UPPER, 0.6, 1.7),
+    ('bicycle', _CAR_LOWER, _CAR_UPPER, 0.6, 1.2)
+)
+
+def _range_key(lower, upper):
+    return lower.tobytes() + upper.tobytes()
+
+def load_resized(image_path, device=None):
     """
-    Preprocess image for model input.
+    Decode an image and resize it to the model input size.
     
     Args:
         image_path (str): Path to the image file
+        device: PyTorch device to decode on (defaults to CPU)
+        
+    Returns:
+        torch.Tensor: uint8 RGB tensor of shape (3, 224, 224)
+    """
+    return _RESIZE(read_rgb(image_path, device))
+
+def _decode_once(image_path):
+    """Decode an image file to a BGR array shared by classification and measurement"""
+    image = load_bgr(image_path)
+    if image is None:
+        raise ValueError(f"Could not load image {image_path}")
+    return image
+
+def preprocess_image(image, device=None):
+    """
+    Preprocess image for model input.
+    
+    Args:
+        image: Path to the image file, or an already decoded BGR array
+        device: PyTorch device to normalize on (defaults to CPU)
         
     Returns:
         torch.Tensor: Preprocessed image tensor
     """
     try:
-        # Read image
-        image = Image.open(image_path).convert('RGB')
-        
-        # Apply transformations
-        transform = transforms.Compose([
-            transforms.Resize((224, 224)),
-            transforms.ToTensor(),
-            transforms.Normalize(mean=[0.485, 0.456, 0.406], 
-                              std=[0.229, 0.224, 0.225])
-        ])
-        
-        # Transform image
-        image_tensor = transform(image)
-        return image_tensor.unsqueeze(0)
+        if isinstance(image, np.ndarray):
+            rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            image_tensor = _RESIZE(torch.from_numpy(rgb).permute(2, 0, 1))
+        else:
+            image_tensor = load_resized(image, device)
+        return normalize_batch(image_tensor.unsqueeze(0), device or torch.device('cpu'))
         
     except Exception as e:
-        logging.error(f"Error preprocessing image {image_path}: {str(e)}")
+        logging.error(f"Error preprocessing image: {str(e)}")
         return None
 
-def process_image(image_path, model, device):
+class _ImageDataset(Dataset):
+    """Dataset yielding preprocessed images for batched classification"""
+    
+    def __init__(self, image_paths):
+        self.image_paths = list(image_paths)
+    
+    def __len__(self):
+        return len(self.image_paths)
+    
+    def __getitem__(self, idx):
+        # Workers only decode and resize; normalization runs on the whole batch
+        try:
+            return load_resized(self.image_paths[idx]), True
+        except Exception as e:
+            logging.error(f"Error preprocessing image {self.image_paths[idx]}: {str(e)}")
+            # Keep the batch shape intact and flag the slot as failed
+            return torch.zeros(3, 224, 224, dtype=torch.uint8), False
+
+def _measure_tree(image_path, tree_type, confidence, image=None):
+    """Combine a classification result with the measured tree dimensions."""
+    # Calculate tree dimensions using advanced measurer
+    dimensions = tree_measurer.calculate_dimensions(image_path, image=image)
+    if dimensions is None:
+        logging.warning(f"Failed to calculate dimensions for {image_path}")
+        return None
+        
+    # Combine results
+    result = {
+        'tree_type': tree_type,
+        'confidence': confidence,
+        'height_m': dimensions['height_m'],
+        'width_m': dimensions['width_m'],
+        'measurement_method': dimensions['method'],
+        'measurement_confidence': dimensions['confidence']
+    }
+    
+    # Add GPS data if available
+    if 'gps' in dimensions:
+        result['gps'] = dimensions['gps']
+    
+    return result
+
+def process_image(image_path, model=None, device=None):
     """
     Process a single image to identify tree type and calculate dimensions.
     
+    Without a model, the image is classified by the shared ModelManager from
+    get_model_manager(), so the model is loaded and cached once per process.
+    
     Args:
         image_path (str): Path to the image file
-        model: PyTorch model for tree type identification
-        device: PyTorch device (CPU/GPU)
+        model: PyTorch model for tree type identification (defaults to the shared manager's model)
+        device: PyTorch device (CPU/GPU), required when model is given
         
     Returns:
         dict: Dictionary containing tree type and dimensions, or None if processing fails
     """
     try:
+        if model is None:
+            tree_type, confidence = identify_tree_type(image_path)
+            return _measure_tree(image_path, tree_type, confidence)
+        
+        # Decode once, the array is reused for measurement below
+        image = _decode_once(image_path)
+        
         # Preprocess image for tree type identification
-        image_tensor = preprocess_image(image_path)
+        image_tensor = preprocess_image(image, device)
         if image_tensor is None:
             return None
-            
-        # Move tensor to device
-        image_tensor = image_tensor.to(device)
         
         # Get model prediction for tree type
-        with torch.no_grad():
+        with torch.inference_mode():
             outputs = model(image_tensor)
-            _, predicted = torch.max(outputs, 1)
-            confidence = torch.nn.functional.softmax(outputs, dim=1)[0][predicted].item()
+            # One softmax gives both the prediction and its probability
+            confidence, predicted = outputs.softmax(dim=1).max(dim=1)
             
         # Get tree type from model's class mapping
         tree_type = model.class_names[predicted.item()]
+        confidence = confidence.item()
         
-        # Calculate tree dimensions using advanced measurer
-        dimensions = tree_measurer.calculate_dimensions(image_path)
-        if dimensions is None:
-            logging.warning(f"Failed to calculate dimensions for {image_path}")
-            return None
-            
-        # Combine results
-        result = {
-            'tree_type': tree_type,
-            'confidence': confidence,
-            'height_m': dimensions['height_m'],
-            'width_m': dimensions['width_m'],
-            'measurement_method': dimensions['method'],
-            'measurement_confidence': dimensions['confidence']
-        }
-        
-        # Add GPS data if available
-        if 'gps' in dimensions:
-            result['gps'] = dimensions['gps']
-        
-        return result
+        return _measure_tree(image_path, tree_type, confidence, image=image)
         
     except Exception as e:
         logging.error(f"Error processing image {image_path}: {str(e)}")
         return None
 
-def find_scale_factor(img):
-    """Find scale factor using reference objects in the image"""
-    try:
-        # Convert to HSV for better color detection
-        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-        
-        # Define color ranges for reference objects
-        reference_ranges = {
-            'car': {
-                'lower': np.array([0, 0, 0]),
-                'upper': np.array([180, 30, 100])
-            },
-            'person': {
-                'lower': np.array([0, 20, 70]),
-                'upper': np.array([20, 255, 255])
-            },
-            'bicycle': {
-                'lower': np.array([0, 0, 0]),
-                'upper': np.array([180, 30, 100])
-            }
-        }
+def classify_images(image_paths, model, device, batch_size=32):
+    """
+    Identify tree types for many images, running the model once per batch.
+    
+    Args:
+        image_paths (list): Paths to the image files
+        model: PyTorch model for tree type identification
+        device: PyTorch device (CPU/GPU)
+        batch_size (int): Number of images per forward pass
         
-        # Reference object dimensions in meters
-        reference_sizes = {
-            'car': {'width': 1.8, 'height': 1.5},
-            'person': {'width': 0.6, 'height': 1.7},
-            'bicycle': {'width': 0.6, 'height': 1.2}
-        }
+    Returns:
+        list: (tree_type, confidence) tuple or None for each image, in input order
+    """
+    # More workers than batches would only sit idle
+    num_batches = -(-len(image_paths) // batch_size)
+    loader = DataLoader(
+        _ImageDataset(image_paths),
+        batch_size=batch_size,
+        num_workers=min(os.cpu_count() or 0, num_batches),
+        pin_memory=device.type == 'cuda'
+    )
+    
+    predictions = []
+    with torch.inference_mode():
+        for batch, valid in loader:
+            outputs = model(normalize_batch(batch, device))
+            confidences, predicted = torch.softmax(outputs, dim=1).max(dim=1)
+            for ok, idx, confidence in zip(valid.tolist(), predicted.tolist(), confidences.tolist()):
+                predictions.append((model.class_names[idx], confidence) if ok else None)
+    return predictions
+
+def process_images(image_paths, model, device, batch_size=32):
+    """
+    Process many images, batching tree type identification on the model.
+    
+    Each image is still decoded twice: once by the data loader for
+    classification and once more by the measurer, which needs the
+    full-resolution BGR array. Both decodes apply the EXIF orientation.
+    
+    Args:
+        image_paths (list): Paths to the image files
+        model: PyTorch model for tree type identification
+        device: PyTorch device (CPU/GPU)
+        batch_size (int): Number of images per forward pass
         
-        for obj_type, ranges in reference_ranges.items():
-            mask = cv2.inRange(hsv, ranges['lower'], ranges['upper'])
-            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    Returns:
+        list: Result dictionary (as returned by process_image) or None for each image
+    """
+    try:
+        predictions = classify_images(image_paths, model, device, batch_size)
+    except Exception as e:
+        logging.error(f"Error classifying image batch: {str(e)}")
+        return [None] * len(image_paths)
+    
+    results = []
+    for image_path, prediction in zip(image_paths, predictions):
+        if prediction is None:
+            results.append(None)
+            continue
+        try:
+            results.append(_measure_tree(image_path, *prediction))
+        except Exception as e:
+            logging.error(f"Error processing image {image_path}: {str(e)}")
+            results.append(None)
+    return results
+
+def find_scale_factor(img, hsv=None):
+    """Find scale factor using reference objects in the image
+    
+    Pass ``hsv`` when the caller already converted the image, to skip the conversion.
+    Masks are built one at a time in priority order, and nothing further is
+    built once a reference object is found.
+    """
+    try:
+        # Convert to HSV for better color detection
+        if hsv is None:
+            hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+        
+        # Each distinct HSV range only needs one mask (car and bicycle share theirs)
+        checked = set()
+        for obj_type, lower, upper, width_m, height_m in _REF_RANGES:
+            key = _range_key(lower, upper)
+            if key in checked:
+                # An identical range already matched nothing
+                continue
+            checked.add(key)
+            box = _largest_blob(cv2.inRange(hsv, lower, upper))
             
-            if contours:
-                # Find the largest contour
-                largest_contour = max(contours, key=cv2.contourArea)
-                x, y, w, h = cv2.boundingRect(largest_contour)
+            if box is not None:
+                # Bounding box of the largest region, read straight from the stats array
+                x, y, w, h = box
                 
                 # Calculate scale factor based on reference object
                 if w > h:  # Use width for scale
-                    scale = reference_sizes[obj_type]['width'] / w
+                    scale = width_m / w
                 else:  # Use height for scale
-                    scale = reference_sizes[obj_type]['height'] / h
+                    scale = height_m / h
                 
                 print(f"Found {obj_type} as reference object")
                 return scale
@@ -181,69 +302,74 @@ def apply_perspective_correction(height_m, width_m, aspect_ratio):
     
     return height_m, width_m
 
-def calculate_dimensions_with_reference(img):
-    """Calculate tree dimensions using reference objects and edge detection"""
+def _largest_blob(mask):
+    """
+    Bounding box of the largest connected region in a binary mask.
+    
+    Uses a single connectedComponentsWithStats pass instead of
+    findContours followed by contourArea/boundingRect per contour.
+    
+    Args:
+        mask (numpy.ndarray): 8-bit single channel mask
+        
+    Returns:
+        tuple: (x, y, w, h) of the largest region, or None if the mask is empty
+    """
+    count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8, ltype=cv2.CV_32S)
+    if count < 2:
+        return None
+    # Row 0 is the background
+    largest = 1 + np.argmax(stats[1:, cv2.CC_STAT_AREA])
+    x, y, w, h = stats[largest, :cv2.CC_STAT_AREA]
+    return int(x), int(y), int(w), int(h)
+
+def calculate_dimensions_with_reference(img, hsv=None, gray=None):
+    """Calculate tree dimensions using reference objects and edge detection
+    
+    ``hsv`` and ``gray`` can be passed in when the caller already has them,
+    e.g. shared with find_scale_factor, so each conversion happens once.
+    """
     try:
-        # Convert to grayscale
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        # Convert once, gray feeds edge detection and HSV both reference masks
+        if gray is None:
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        if hsv is None:
+            hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
         
         # Apply Canny edge detection
         edges = cv2.Canny(gray, 50, 150)
         
-        # Apply morphological operations to clean up edges
+        # Apply morphological operations to clean up edges in place
         kernel = np.ones((5,5), np.uint8)
-        edges = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, kernel)
-        
-        # Find contours
-        contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        cv2.morphologyEx(edges, cv2.MORPH_CLOSE, kernel, dst=edges)
         
-        if not contours:
+        # Find the largest edge region (assumed to be the tree)
+        tree_box = _largest_blob(edges)
+        if tree_box is None:
             print("No edges found for reference-based calculation")
             return 0.0, 0.0
-            
-        # Find the largest contour (assumed to be the tree)
-        tree_contour = max(contours, key=cv2.contourArea)
-        x, y, w, h = cv2.boundingRect(tree_contour)
+        x, y, w, h = tree_box
         
         # Look for reference objects (cars or people)
-        # Convert to HSV for better color detection
-        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
-        
-        # Define color ranges for common reference objects
-        # Cars (typically dark gray/black)
-        lower_car = np.array([0, 0, 0])
-        upper_car = np.array([180, 30, 100])
-        
-        # People (skin tones)
-        lower_skin = np.array([0, 20, 70])
-        upper_skin = np.array([20, 255, 255])
-        
-        # Create masks for reference objects
-        car_mask = cv2.inRange(hsv, lower_car, upper_car)
-        skin_mask = cv2.inRange(hsv, lower_skin, upper_skin)
-        
-        # Find reference objects
-        car_contours, _ = cv2.findContours(car_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        skin_contours, _ = cv2.findContours(skin_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        
         # Calculate scale factor based on reference objects
         scale_factor = None
         
         # Try to find a car first (more reliable reference)
-        if car_contours:
-            car_contour = max(car_contours, key=cv2.contourArea)
-            car_x, car_y, car_w, car_h = cv2.boundingRect(car_contour)
+        car_box = _largest_blob(cv2.inRange(hsv, _CAR_LOWER, _CAR_UPPER))
+        if car_box is not None:
+            car_w = car_box[2]
             # Average car width is about 1.8 meters
             scale_factor = 1.8 / car_w
             print(f"Using car as reference (width: {car_w}px)")
         
-        # If no car found, try to find a person
-        elif skin_contours:
-            person_contour = max(skin_contours, key=cv2.contourArea)
-            person_x, person_y, person_w, person_h = cv2.boundingRect(person_contour)
-            # Average person height is about 1.7 meters
-            scale_factor = 1.7 / person_h
-            print(f"Using person as reference (height: {person_h}px)")
+        # If no car found, try to find a person (the skin mask is only built if needed)
+        else:
+            person_box = _largest_blob(cv2.inRange(hsv, _SKIN_LOWER, _SKIN_UPPER))
+            if person_box is not None:
+                person_h = person_box[3]
+                # Average person height is about 1.7 meters
+                scale_factor = 1.7 / person_h
+                print(f"Using person as reference (height: {person_h}px)")
         
         # If no reference objects found, use image-based estimation
         if scale_factor is None:
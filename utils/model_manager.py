@@ -7,15 +7,14 @@ It provides functionality for loading the model, preprocessing images, and makin
 Dependencies:
     - torch: Deep learning framework
     - torchvision: Computer vision utilities
-    - PIL: Image processing
 """
 
 import os
 import torch
-import torchvision.transforms as transforms
-from PIL import Image
+from torchvision.transforms import v2
 import random
 from typing import Tuple, List, Dict
+from .tensor_transforms import normalize_batch, prepare_model, read_rgb, to_device
 
 class ModelManager:
     """Manages different pre-trained models for tree identification"""
@@ -30,6 +29,9 @@ class ModelManager:
         self.models_dir = models_dir
         self.current_model = None
         self.current_model_name = None
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        # Class labels per model name, read once when the model is loaded
+        self._labels: Dict[str, List[str]] = {}
         self.model_configs = {
             "densenet": {
                 "model_path": os.path.join(models_dir, "UrbanTreeDenseNet.pt"),
@@ -76,6 +78,9 @@ class ModelManager:
         if model_name not in self.model_configs:
             print(f"Model {model_name} not found in configurations")
             return False
+        
+        if self.current_model_name == model_name and self.current_model is not None:
+            return True
             
         config = self.model_configs[model_name]
         
@@ -84,9 +89,18 @@ class ModelManager:
                 print(f"Model file not found at {config['model_path']}")
                 return False
                 
-            self.current_model = torch.load(config["model_path"])
-            self.current_model.eval()
+            # The file is a whole pickled module rather than a state dict,
+            # which weights_only loading cannot reconstruct
+            model = torch.load(config["model_path"], map_location=self.device, weights_only=False)
+            self.current_model = prepare_model(model.eval(), self.device)
             self.current_model_name = model_name
+            
+            # Labels are optional, identification falls back to class indices
+            labels = []
+            if os.path.exists(config["labels_path"]):
+                with open(config["labels_path"], 'r') as f:
+                    labels = [line.strip() for line in f]
+            self._labels[model_name] = labels
             print(f"Loaded {model_name} model successfully")
             return True
             
@@ -94,90 +108,123 @@ class ModelManager:
             print(f"Error loading model {model_name}: {str(e)}")
             return False
 
-    def resize_image(self, image_path: str, target_size: Tuple[int, int] = (224, 224)) -> Image.Image:
+    def resize_image(self, image_path: str, target_size: Tuple[int, int] = (224, 224)) -> torch.Tensor:
         """
         Resize image while maintaining aspect ratio
         
+        The image is decoded with torchvision.io (on the GPU for JPEGs when
+        the model is on CUDA) and letterboxed onto a black background.
+        
         Args:
             image_path (str): Path to the image file
             target_size (tuple): Target size (width, height)
             
         Returns:
-            PIL.Image: Resized image
+            torch.Tensor: Resized uint8 RGB image of shape (3, height, width)
         """
-        img = Image.open(image_path).convert('RGB')
-        ratio = min(target_size[0]/img.size[0], target_size[1]/img.size[1])
-        new_size = tuple([int(x*ratio) for x in img.size])
-        img = img.resize(new_size, Image.LANCZOS)
-        new_img = Image.new('RGB', target_size)
-        new_img.paste(img, ((target_size[0]-new_size[0])//2, (target_size[1]-new_size[1])//2))
-        return new_img
+        # Only GPU-decoded JPEGs start on the device, bring the rest over too
+        img = to_device(read_rgb(image_path, self.device), self.device)
+        height, width = img.shape[-2:]
+        ratio = min(target_size[0]/width, target_size[1]/height)
+        new_width, new_height = int(width*ratio), int(height*ratio)
+        img = v2.functional.resize(img, [new_height, new_width], antialias=True)
+        left = (target_size[0]-new_width)//2
+        top = (target_size[1]-new_height)//2
+        return torch.nn.functional.pad(
+            img, (left, target_size[0]-new_width-left, top, target_size[1]-new_height-top)
+        )
 
-    def identify_tree_type(self, image_path: str) -> Tuple[str, float]:
+    def _best_match(self, labels: List[str], top_probs: torch.Tensor,
+                    top_indices: torch.Tensor, threshold: float) -> Tuple[str, float]:
         """
-        Identify tree type using the current model
+        Pick the best label from a single image's top predictions
         
         Args:
-            image_path (str): Path to the image file
+            labels (list): Class labels, or an empty list if none are available
+            top_probs (torch.Tensor): Top probabilities for the image
+            top_indices (torch.Tensor): Class indices matching top_probs
+            threshold (float): Confidence threshold of the current model
             
         Returns:
             tuple: (tree_type, confidence)
         """
+        best_idx = top_indices[0].item()
+        best_prob = top_probs[0].item()
+        if not labels:
+            return f"Tree Class {best_idx}", best_prob
+        
+        best_label = labels[best_idx]
+        
+        # Print top 3 matches for debugging
+        print("\nTop 3 matches:")
+        for prob, idx in zip(top_probs.tolist(), top_indices.tolist()):
+            print(f"{labels[idx]}: {prob:.2%}")
+        
+        # Return the best match if confidence is above threshold
+        if best_prob > threshold:
+            print(f"Identified as: {best_label} (confidence: {best_prob:.2%})")
+        else:
+            print(f"Low confidence prediction ({best_prob:.2%}) for {best_label}")
+        # Return the best match even if below threshold
+        return best_label, best_prob
+
+    @torch.inference_mode()
+    def identify_tree_type(self, image_paths: List[str]) -> List[Tuple[str, float]]:
+        """
+        Identify tree types for a batch of images using the current model
+        
+        All images are preprocessed first and run through the model in a
+        single forward pass. The whole call runs under inference mode, so
+        decoding and resizing skip autograd bookkeeping as well.
+        
+        Args:
+            image_paths (list): Paths to the image files
+            
+        Returns:
+            list: (tree_type, confidence) for each image, in input order
+        """
         if not self.current_model:
             print("No model loaded. Using placeholder results.")
-            return random.choice(self.placeholder_trees), random.uniform(0.7, 0.95)
+            return [
+                (random.choice(self.placeholder_trees), random.uniform(0.7, 0.95))
+                for _ in image_paths
+            ]
 
+        results = [("Unknown Tree", 0.0)] * len(image_paths)
         try:
             config = self.model_configs[self.current_model_name]
             
-            # Load and preprocess image
-            img = self.resize_image(image_path, config["input_size"])
-            transform = transforms.Compose([
-                transforms.ToTensor(),
-                transforms.Normalize(mean=[0.485, 0.456, 0.406], std=[0.229, 0.224, 0.225])
-            ])
-            img_tensor = transform(img).unsqueeze(0)
+            # Load and preprocess images, skipping any that fail
+            tensors = []
+            indices = []
+            for i, image_path in enumerate(image_paths):
+                try:
+                    img = self.resize_image(image_path, config["input_size"])
+                    tensors.append(img)
+                    indices.append(i)
+                except Exception as e:
+                    print(f"Error preprocessing {image_path}: {str(e)}")
+            if not tensors:
+                return results
 
-            # Get prediction
-            with torch.no_grad():
-                outputs = self.current_model(img_tensor)
-                probabilities = torch.nn.functional.softmax(outputs, dim=1)[0]
-                
-                # Get top 3 predictions
-                top3_prob, top3_indices = torch.topk(probabilities, 3)
-                
-                # Load labels
-                if os.path.exists(config["labels_path"]):
-                    with open(config["labels_path"], 'r') as f:
-                        labels = [line.strip() for line in f.readlines()]
-                    
-                    # Get the best match
-                    best_idx = top3_indices[0].item()
-                    best_prob = top3_prob[0].item()
-                    best_label = labels[best_idx]
-                    
-                    # Print top 3 matches for debugging
-                    print("\nTop 3 matches:")
-                    for i in range(3):
-                        idx = top3_indices[i].item()
-                        prob = top3_prob[i].item()
-                        label = labels[idx]
-                        print(f"{label}: {prob:.2%}")
-                    
-                    # Return the best match if confidence is above threshold
-                    if best_prob > config["confidence_threshold"]:
-                        print(f"Identified as: {best_label} (confidence: {best_prob:.2%})")
-                        return best_label, best_prob
-                    else:
-                        print(f"Low confidence prediction ({best_prob:.2%}) for {best_label}")
-                        # Return the best match even if below threshold
-                        return best_label, best_prob
-                else:
-                    return f"Tree Class {best_idx}", best_prob
+            # Get predictions for the whole batch
+            batch = normalize_batch(torch.stack(tensors), self.device)
+            outputs = self.current_model(batch)
+            probabilities = torch.nn.functional.softmax(outputs, dim=1)
+            
+            # Get top 3 predictions per image
+            top3_prob, top3_indices = torch.topk(probabilities, 3, dim=1)
+            
+            labels = self._labels.get(self.current_model_name, [])
+            for row, i in enumerate(indices):
+                results[i] = self._best_match(
+                    labels, top3_prob[row], top3_indices[row], config["confidence_threshold"]
+                )
+            return results
 
         except Exception as e:
             print(f"Error identifying tree type: {str(e)}")
-            return "Unknown Tree", 0.0
+            return [("Unknown Tree", 0.0)] * len(image_paths)
 
     def get_available_models(self) -> List[Dict]:
         """
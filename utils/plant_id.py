@@ -3,15 +3,22 @@ import torchvision.transforms as transforms
 from PIL import Image
 import os
 import random
-from .model_manager import ModelManager
+import functools
+from .model_manager import get_model_manager
 
 # Define the model path
 MODEL_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models', 'UrbanTreeDenseNet.pt')
 LABELS_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models', 'urban_tree_labels.txt')
 
-# Initialize model manager and load the model
-model_manager = ModelManager()
-model_manager.load_model("densenet")  # Load the DenseNet model
+# Share the process-wide model manager, the model itself is loaded on first use
+model_manager = get_model_manager()
+
+@functools.lru_cache(maxsize=1)
+def _load_default_model():
+    """Load the DenseNet model the first time a tree is identified"""
+    if model_manager.current_model is not None:
+        return True
+    return model_manager.load_model("densenet")
 
 def resize_image(image_path, target_size=(224, 224)):
     """Resize image to target size while maintaining aspect ratio"""
@@ -21,4 +28,5 @@ def resize_image(image_path, target_size=(224, 224)):
 
 def identify_tree_type(image_path):
     """Identify tree type using pre-trained model"""
-    return model_manager.identify_tree_type(image_path)
\ No newline at end of file
+    _load_default_model()
+    return model_manager.identify_tree_type([image_path])[0]
\ No newline at end of file
@@ -0,0 +1,146 @@
+"""
+Tensor Transform Module for Tree Analysis Application
+
+This module holds the torchvision preprocessing shared by the classifiers.
+The transforms are built once at import and operate on uint8 CHW tensors,
+so they can run on a whole batch after it has been moved to the model's
+device instead of on individual PIL images.
+
+Dependencies:
+    - torch: Tensor operations
+    - torchvision: v2 transforms and image decoding
+    - cv2: Decoding fallback for formats torchvision cannot read
+"""
+
+import cv2
+import torch
+from torch import nn
+from torchvision.io import read_file, decode_image, decode_jpeg, ImageReadMode
+from torchvision.transforms import v2
+from .image_io import exif_orientation, load_bgr
+
+# JPEG files start with the SOI marker
+_JPEG_MAGIC = (0xFF, 0xD8)
+
+# Transform that brings a CHW tensor upright for each EXIF orientation value
+_ORIENTATION_FIXES = {
+    2: lambda img: img.flip(-1),
+    3: lambda img: img.flip(-2, -1),
+    4: lambda img: img.flip(-2),
+    5: lambda img: img.transpose(-2, -1),
+    6: lambda img: torch.rot90(img, -1, (-2, -1)),
+    7: lambda img: img.transpose(-2, -1).flip(-2, -1),
+    8: lambda img: torch.rot90(img, 1, (-2, -1))
+}
+
+# ImageNet statistics the DenseNet models were trained with
+IMAGENET_MEAN = (0.485, 0.456, 0.406)
+IMAGENET_STD = (0.229, 0.224, 0.225)
+
+class Normalize(nn.Module):
+    """Per-channel normalization with mean/std kept as module buffers"""
+
+    def __init__(self, mean=IMAGENET_MEAN, std=IMAGENET_STD):
+        super().__init__()
+        # Buffers follow the module across .to(device) and are never rebuilt
+        self.register_buffer('mean', torch.tensor(mean).view(-1, 1, 1))
+        self.register_buffer('std', torch.tensor(std).view(-1, 1, 1))
+
+    def forward(self, x):
+        return (x - self.mean) / self.std
+
+def read_rgb(image_path, device=None):
+    """
+    Decode an image file to a uint8 RGB tensor without going through PIL.
+
+    JPEGs are decoded directly on the GPU when a CUDA device is given.
+    The EXIF orientation is applied, matching images decoded by load_bgr;
+    the GPU decoder ignores it, so those images are rotated afterwards.
+
+    Args:
+        image_path (str): Path to the image file
+        device: PyTorch device to decode on (defaults to CPU)
+
+    Returns:
+        torch.Tensor: uint8 tensor of shape (3, H, W)
+    """
+    data = read_file(image_path)
+    if device is not None and torch.device(device).type == 'cuda' \
+            and tuple(data[:2].tolist()) == _JPEG_MAGIC:
+        image = decode_jpeg(data, mode=ImageReadMode.RGB, device=device)
+        fix = _ORIENTATION_FIXES.get(exif_orientation(data.numpy()))
+        return fix(image) if fix else image
+    try:
+        return decode_image(data, mode=ImageReadMode.RGB, apply_exif_orientation=True)
+    except RuntimeError:
+        image = load_bgr(image_path)
+        if image is None:
+            raise ValueError(f"Could not decode image {image_path}")
+        return torch.from_numpy(cv2.cvtColor(image, cv2.COLOR_BGR2RGB)).permute(2, 0, 1)
+
+def resize(size=(224, 224)):
+    """Resize uint8 images, cheap enough to run in data loader workers"""
+    return v2.Resize(size, antialias=True)
+
+# Converts a uint8 batch to normalized float32, run on the model's device
+NORMALIZE = nn.Sequential(
+    v2.ToDtype(torch.float32, scale=True),
+    Normalize()
+)
+
+def prepare_model(model, device):
+    """
+    Convert a model to the fastest layout for its device.
+
+    On CUDA the weights are cast to float16 and stored channels-last, which
+    lets the DenseNet convolutions run on Tensor Cores. CPU models are left
+    in float32.
+
+    Args:
+        model: PyTorch model already moved to the device
+        device: PyTorch device (CPU/GPU)
+
+    Returns:
+        The converted model
+    """
+    if torch.device(device).type == 'cuda':
+        model = model.to(memory_format=torch.channels_last).half()
+    return model
+
+def to_device(tensor, device):
+    """
+    Copy a tensor to the device without blocking the host.
+
+    CPU tensors headed for CUDA are staged in pinned memory so the copy can
+    run asynchronously; tensors already on the device are returned as is.
+
+    Args:
+        tensor (torch.Tensor): Tensor to move
+        device: PyTorch device (CPU/GPU)
+
+    Returns:
+        torch.Tensor: Tensor on the device
+    """
+    device = torch.device(device)
+    if device.type == 'cuda' and tensor.device.type == 'cpu' and not tensor.is_pinned():
+        tensor = tensor.pin_memory()
+    return tensor.to(device, non_blocking=True)
+
+def normalize_batch(batch, device):
+    """
+    Move a uint8 image batch to the device and normalize it there.
+
+    On CUDA the result matches a model converted by prepare_model:
+    float16 in channels-last layout.
+
+    Args:
+        batch (torch.Tensor): uint8 tensor of shape (N, 3, H, W)
+        device: PyTorch device (CPU/GPU)
+
+    Returns:
+        torch.Tensor: Normalized batch on the device
+    """
+    batch = NORMALIZE.to(device)(to_device(batch, device))
+    if torch.device(device).type == 'cuda':
+        batch = batch.to(memory_format=torch.channels_last, dtype=torch.float16)
+    return batch
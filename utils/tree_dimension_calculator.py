@@ -2,21 +2,231 @@ import cv2
 import numpy as np
 from PIL import Image, ExifTags
 import math
+import mmap
 import os
 import logging
+import atexit
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+import multiprocessing
+import multiprocessing.util
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from .image_io import decode_bgr
+
+try:
+    import piexif
+except Exception:
+    piexif = None
+
+# Background pool for encoding and writing annotated images
+_IO_POOL = ThreadPoolExecutor(max_workers=2)
+# Drain pending writes before the interpreter exits
+atexit.register(_IO_POOL.shutdown, wait=True)
+
+# Let OpenCV use its SIMD paths and every core for detection
+cv2.setUseOptimized(True)
+cv2.setNumThreads(os.cpu_count() or 1)
+# Run detection through OpenCL when a device is available
+cv2.ocl.setUseOpenCL(cv2.ocl.haveOpenCL())
+
+# Cascades are shared by every calculator but are not safe to run concurrently
+_CASCADE_LOCK = threading.Lock()
+
+# Cascades run on a copy of the image whose longer side is at most this many pixels
+_DETECTION_MAX_DIM = 640
+# Smallest window searched on the downscaled image, skips the tiniest scales
+_DETECTION_MIN_SIZE = (24, 24)
+
+# Tangent of the assumed 30 degree half field of view used for distance estimation
+_TAN30 = math.tan(math.radians(30))
+
+# Sensor width assumed when EXIF has a focal length but no sensor information
+_FULL_FRAME_SENSOR_MM = 36.0
+
+# Segmentation runs on a copy whose longer side is at most this many pixels
+_SEGMENTATION_MAX_DIM = 800
+
+# HSV range for green colors (trees/foliage), uint8 as cv2.inRange expects
+_GREEN_LOWER = np.array([35, 40, 40], np.uint8)
+_GREEN_UPPER = np.array([85, 255, 255], np.uint8)
+
+# Structuring element for cleaning up the foliage mask
+_KERNEL5 = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+
+# Pointer tag of the Exif sub-IFD inside the primary IFD
+_EXIF_IFD = 0x8769
+
+# JPEG files start with the SOI marker
+_JPEG_MAGIC = b'\xff\xd8'
+
+# The only EXIF tags the measurement uses, as (piexif IFD name, tag id, name)
+_MEASUREMENT_TAGS = (
+    ('0th', 0x0112, 'Orientation'),
+    ('Exif', 0x920A, 'FocalLength'),
+    ('Exif', 0xA20E, 'FocalPlaneXResolution'),
+    ('Exif', 0xA210, 'FocalPlaneResolutionUnit')
+)
+
+# Number of dimension results kept per process, keyed by image content
+_DIMENSION_CACHE_SIZE = 1024
+
+def _exif_segment(buf):
+    """Return the Exif APP1 payload of a JPEG, walking only the header segments"""
+    head = 2
+    while head + 4 <= len(buf):
+        marker = buf[head:head + 2]
+        # Start of scan, only compressed image data follows
+        if marker == b'\xff\xda':
+            break
+        length = int.from_bytes(buf[head + 2:head + 4], 'big')
+        if marker == b'\xff\xe1' and buf[head + 4:head + 10] == b'Exif\x00\x00':
+            return buf[head + 4:head + 2 + length]
+        head += 2 + length
+    return None
+
+def _measurement_exif(data):
+    """Pick the measurement tags out of an Exif APP1 payload with piexif"""
+    exif = piexif.load(data)
+    tags = {}
+    for ifd, tag, name in _MEASUREMENT_TAGS:
+        value = exif.get(ifd, {}).get(tag)
+        if isinstance(value, tuple):
+            # piexif returns rationals as (numerator, denominator)
+            if len(value) != 2 or not value[1]:
+                continue
+            value = value[0] / value[1]
+        if value is not None:
+            tags[name] = value
+    return tags
+
+def _exif_from_mmap(mm):
+    """
+    Named EXIF tags of an image mapped into memory.
+
+    JPEGs are parsed with piexif when it is installed, keeping only the
+    orientation, focal length and focal plane tags. Other formats read the
+    primary IFD and the Exif sub-IFD (where FocalLength lives) from a single
+    getexif() parse, matching what _getexif() used to return.
+    """
+    if piexif is not None and mm[:2] == _JPEG_MAGIC:
+        segment = _exif_segment(mm)
+        return _measurement_exif(segment) if segment else {}
+    
+    mm.seek(0)
+    with Image.open(mm) as img:
+        exif = img.getexif()
+        exif_data = dict(exif)
+        exif_data.update(exif.get_ifd(_EXIF_IFD))
+    return {
+        ExifTags.TAGS[k]: v
+        for k, v in exif_data.items()
+        if k in ExifTags.TAGS
+    }
+
+@functools.lru_cache(maxsize=256)
+def _exif_for(image_path, mtime):
+    """Named EXIF tags of an image, parsed once per path and modification time"""
+    with open(image_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return _exif_from_mmap(mm)
+
+def _read_image(image_path):
+    """
+    Decode an image, its EXIF tags and a digest of its contents from a single
+    memory mapping of the file.
+
+    Returns:
+        tuple: (BGR image or None, metadata dict, content digest or None)
+    """
+    try:
+        with open(image_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None, {}, None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                digest = hashlib.blake2b(mm, digest_size=16).digest()
+                buf = np.frombuffer(mm, np.uint8)
+                try:
+                    image = decode_bgr(buf, image_path)
+                finally:
+                    # The mapping cannot close while an array still exports it
+                    del buf
+                try:
+                    metadata = _exif_from_mmap(mm)
+                except Exception as e:
+                    logging.warning(f"Error reading metadata: {str(e)}")
+                    metadata = {}
+    except OSError as e:
+        logging.error(f"Could not read image {image_path}: {str(e)}")
+        return None, {}, None
+    return image, metadata, digest
+
+def _write_annotated(output_path, image):
+    """Write an annotated image, logging the failures a background write would otherwise drop"""
+    try:
+        if cv2.imwrite(output_path, image):
+            return True
+        logging.error(f"Could not write annotated image {output_path}")
+    except Exception as e:
+        logging.error(f"Error writing annotated image {output_path}: {str(e)}")
+    return False
+
+# Measurements of images read from disk, keyed by content digest, least recently used first
+_DIMENSION_CACHE = OrderedDict()
+_DIMENSION_CACHE_LOCK = threading.Lock()
+
+def _cached_measurement(digest):
+    """Return the (height_m, width_m, tree_box, method) remembered for a digest, or None"""
+    with _DIMENSION_CACHE_LOCK:
+        measurement = _DIMENSION_CACHE.get(digest)
+        if measurement is not None:
+            _DIMENSION_CACHE.move_to_end(digest)
+        return measurement
+
+def _remember_measurement(digest, measurement):
+    with _DIMENSION_CACHE_LOCK:
+        _DIMENSION_CACHE[digest] = measurement
+        if len(_DIMENSION_CACHE) > _DIMENSION_CACHE_SIZE:
+            _DIMENSION_CACHE.popitem(last=False)
 
 class TreeDimensionCalculator:
     def __init__(self):
-        # Initialize reference object detectors
-        self.car_cascade = self._load_cascade('haarcascade_car.xml')
-        self.person_cascade = self._load_cascade('haarcascade_fullbody.xml')
+        # Typical smartphone parameters, used when EXIF has no focal length
+        self._default_sensor_mm = 6.17  # Sensor width
+        self._default_focal_mm = 4.2    # Focal length
+        self._default_focal_ratio = self._default_focal_mm / self._default_sensor_mm
+    
+    @property
+    def car_cascade(self):
+        """Car detector, loaded on first use"""
+        return self._load_cascade('haarcascade_car.xml')
+    
+    @property
+    def person_cascade(self):
+        """Full-body person detector, loaded on first use"""
+        return self._load_cascade('haarcascade_fullbody.xml')
     
-    def _load_cascade(self, cascade_name):
-        """Try to load Haar cascade from different possible locations"""
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _load_cascade(cascade_name):
+        """Try to load a cascade from different possible locations
+        
+        An LBP variant (lbpcascade_*.xml) is preferred over the Haar file when
+        one is available, as LBP cascades evaluate several times faster.
+        Each cascade is parsed once and shared by all instances.
+        """
+        names = [cascade_name]
+        if cascade_name.startswith('haarcascade_'):
+            names.insert(0, 'lbpcascade_' + cascade_name[len('haarcascade_'):])
+        
         paths = [
-            os.path.join(cv2.data.haarcascades, cascade_name),
-            cascade_name,
-            os.path.join(os.path.dirname(__file__), cascade_name)
+            path
+            for name in names
+            for path in (
+                os.path.join(cv2.data.haarcascades, name),
+                name,
+                os.path.join(os.path.dirname(__file__), name)
+            )
         ]
         
         for path in paths:
@@ -27,72 +237,86 @@ class TreeDimensionCalculator:
     def get_image_metadata(self, image_path):
         """Extract EXIF metadata from image"""
         try:
-            with Image.open(image_path) as img:
-                exif_data = img._getexif()
-                if exif_data:
-                    return {
-                        ExifTags.TAGS[k]: v
-                        for k, v in exif_data.items()
-                        if k in ExifTags.TAGS
-                    }
-            return {}
+            # Copy so callers can't modify the cached tags
+            return dict(_exif_for(image_path, os.path.getmtime(image_path)))
         except Exception as e:
             logging.warning(f"Error reading metadata: {str(e)}")
             return {}
 
     def calculate_focal_length_pixels(self, metadata, image_width):
         """Calculate focal length in pixels using EXIF data"""
-        try:
-            # Get focal length in mm from EXIF
-            focal_length_mm = float(metadata['FocalLength'])
-            
-            # Get sensor width (approximate if not available)
-            sensor_width_mm = 36.0  # Default full-frame sensor width
-            
-            # Check for sensor information
-            if 'FocalPlaneResolutionUnit' in metadata:
-                if 'FocalPlaneXResolution' in metadata:
-                    sensor_width_mm = (
-                        image_width * 
-                        float(metadata['FocalPlaneResolutionUnit']) / 
-                        float(metadata['FocalPlaneXResolution'])
-                    )
-            
-            # Calculate focal length in pixels
-            return (image_width * focal_length_mm) / sensor_width_mm
-            
-        except KeyError:
+        # Get focal length in mm from EXIF
+        focal_length_mm = metadata.get('FocalLength')
+        if focal_length_mm is None:
             # Default to common smartphone parameters if no EXIF
-            sensor_width_mm = 6.17  # Typical smartphone sensor width
-            focal_length_mm = 4.2   # Typical smartphone focal length
-            return (image_width * focal_length_mm) / sensor_width_mm
+            return image_width * self._default_focal_ratio
+        
+        # With sensor information the image width cancels out:
+        # f_mm * width / (width * unit / x_res) == f_mm * x_res / unit
+        unit = metadata.get('FocalPlaneResolutionUnit')
+        x_res = metadata.get('FocalPlaneXResolution')
+        if unit is not None and x_res is not None:
+            return float(focal_length_mm) * float(x_res) / float(unit)
+        
+        # Otherwise assume a full-frame sensor
+        return image_width * float(focal_length_mm) / _FULL_FRAME_SENSOR_MM
 
     def improved_tree_segmentation(self, image):
-        """Better tree segmentation using color and morphology"""
+        """Better tree segmentation using color and morphology
+        
+        Segmentation runs on a copy downscaled to at most 800 px on the longer
+        side; only the bounding box is needed, so full resolution is wasted work.
+        
+        Returns:
+            tuple: (x, y, w, h) of the tree in full-resolution pixels, or None
+        """
+        scale = min(1.0, _SEGMENTATION_MAX_DIM / max(image.shape[:2]))
+        if scale < 1.0:
+            image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        
+        # Let OpenCV run the mask pipeline on the OpenCL device when there is one
+        use_ocl = cv2.ocl.useOpenCL()
+        if use_ocl:
+            image = cv2.UMat(image)
+        
         # Convert to HSV color space
         hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
         
-        # Define range for green colors (trees/foliage)
-        lower_green = np.array([35, 40, 40])
-        upper_green = np.array([85, 255, 255])
-        
-        # Create mask and refine it
-        mask = cv2.inRange(hsv, lower_green, upper_green)
-        kernel = np.ones((5,5), np.uint8)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
+        # Create mask of green colors and refine it in place
+        mask = cv2.inRange(hsv, _GREEN_LOWER, _GREEN_UPPER)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, _KERNEL5, dst=mask)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, _KERNEL5, dst=mask)
+        if use_ocl:
+            mask = mask.get()
         
         # Find contours and select the largest one
         contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        return max(contours, key=cv2.contourArea) if contours else None
+        if not contours:
+            return None
+        x, y, w, h = cv2.boundingRect(max(contours, key=cv2.contourArea))
+        return tuple(int(round(v / scale)) for v in (x, y, w, h))
+
+    def _detect(self, cascade, gray, scale):
+        """Run a cascade on the downscaled image, boxes are returned at full resolution"""
+        # detectMultiScale already spreads the scales over all cores
+        with _CASCADE_LOCK:
+            boxes = cascade.detectMultiScale(gray, 1.1, 3, minSize=_DETECTION_MIN_SIZE)
+        return [tuple(int(round(v / scale)) for v in box) for box in boxes]
 
     def detect_reference_object(self, image):
         """Detect reference objects using cascade classifiers"""
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         
+        # Detect on a smaller copy, far fewer integral-image pixels to scan
+        scale = min(1.0, _DETECTION_MAX_DIM / max(gray.shape[:2]))
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        if cv2.ocl.useOpenCL():
+            gray = cv2.UMat(gray)
+        
         # Try detecting cars
         if self.car_cascade:
-            cars = self.car_cascade.detectMultiScale(gray, 1.1, 3)
+            cars = self._detect(self.car_cascade, gray, scale)
             if len(cars) > 0:
                 x,y,w,h = cars[0]  # Take first detected car
                 return {
@@ -105,7 +329,7 @@ class TreeDimensionCalculator:
         
         # Try detecting people
         if self.person_cascade:
-            people = self.person_cascade.detectMultiScale(gray, 1.1, 3)
+            people = self._detect(self.person_cascade, gray, scale)
             if len(people) > 0:
                 x,y,w,h = people[0]  # Take first detected person
                 return {
@@ -135,28 +359,76 @@ class TreeDimensionCalculator:
         
         return height_m, width_m
 
-    def calculate_tree_dimensions(self, image_path):
-        """Main function to calculate tree dimensions"""
+    def _save_annotated(self, image_path, image, tree_box, height_m, width_m, method):
+        """Draw the measurement on image and write it next to image_path in the background
+        
+        Returns:
+            concurrent.futures.Future: Resolves to True once the file is written, False if writing failed
+        """
+        x, y, w, h = tree_box
+        cv2.rectangle(image, (x, y), (x + w, y + h), (0, 255, 0), 2)
+        cv2.putText(image, f"H: {height_m:.2f}m", (x, y - 10), 
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        cv2.putText(image, f"W: {width_m:.2f}m", (x + w + 10, y + h//2), 
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        cv2.putText(image, f"Method: {method}", (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        
+        # Encode and write in the background; the image is not touched after this point
+        output_path = os.path.splitext(image_path)[0] + '_analyzed.jpg'
+        future = _IO_POOL.submit(_write_annotated, output_path, image)
+        logging.info(f"Saving results to {output_path}")
+        return future
+
+    def calculate_tree_dimensions(self, image_path, image=None, metadata=None):
+        """Main function to calculate tree dimensions
+        
+        Pass an already decoded BGR ``image`` and/or its EXIF ``metadata`` to
+        skip reading image_path again. Otherwise the pixels and the EXIF tags
+        are both taken from one read of the file. A supplied image is copied
+        before annotating, the caller's array is never drawn on.
+        
+        When neither is supplied, the measurement is remembered by the file's
+        content digest; an identical image skips segmentation and detection
+        but is still annotated and written for its own path.
+        """
         try:
-            # Read image and get metadata
-            image = cv2.imread(image_path)
+            digest = None
+            # Read image unless the caller already decoded it, then get metadata
+            if image is None:
+                image, file_metadata, digest = _read_image(image_path)
+                if metadata is None:
+                    metadata = file_metadata
+                else:
+                    # Caller metadata can change the result, only plain calls are memoized
+                    digest = None
+            else:
+                # Annotations are drawn and written in the background, keep them off the caller's array
+                image = image.copy()
             if image is None:
                 logging.error(f"Could not read image: {image_path}")
                 return None, None
+            
+            measurement = _cached_measurement(digest) if digest is not None else None
+            if measurement is not None:
+                height_m, width_m, tree_box, method = measurement
+                self._save_annotated(image_path, image, tree_box, height_m, width_m, method)
+                return height_m, width_m
 
-            metadata = self.get_image_metadata(image_path)
+            if metadata is None:
+                metadata = self.get_image_metadata(image_path)
             img_height, img_width = image.shape[:2]
             
             # Get focal length in pixels
             focal_length_px = self.calculate_focal_length_pixels(metadata, img_width)
             
             # Segment tree
-            tree_contour = self.improved_tree_segmentation(image)
-            if tree_contour is None:
+            tree_box = self.improved_tree_segmentation(image)
+            if tree_box is None:
                 logging.error("Could not detect tree in image")
                 return None, None
             
-            x, y, w, h = cv2.boundingRect(tree_contour)
+            x, y, w, h = tree_box
             
             # Try to find reference object
             reference = self.detect_reference_object(image)
@@ -168,8 +440,8 @@ class TreeDimensionCalculator:
             else:
                 # Method 2: Use camera geometry if we have metadata
                 if metadata and 'FocalLength' in metadata:
-                    # Simplified distance estimation
-                    distance_estimate = (h * focal_length_px) / (h * math.tan(math.radians(30)))
+                    # Simplified distance estimation, the tree's pixel height cancels out
+                    distance_estimate = focal_length_px / _TAN30
                     px_per_meter = focal_length_px / distance_estimate
                     method = "Camera geometry estimation"
                 else:
@@ -190,19 +462,13 @@ class TreeDimensionCalculator:
             height_m = max(1.0, min(50.0, height_m))  # Reasonable tree height range
             width_m = max(0.5, min(15.0, width_m))    # Reasonable width range
             
-            # Draw and save results
-            cv2.rectangle(image, (x, y), (x + w, y + h), (0, 255, 0), 2)
-            cv2.putText(image, f"H: {height_m:.2f}m", (x, y - 10), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            cv2.putText(image, f"W: {width_m:.2f}m", (x + w + 10, y + h//2), 
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-            cv2.putText(image, f"Method: {method}", (10, 30),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+            # Only successful measurements are worth remembering
+            if digest is not None:
+                _remember_measurement(digest, (height_m, width_m, tree_box, method))
             
-            output_path = os.path.splitext(image_path)[0] + '_analyzed.jpg'
-            cv2.imwrite(output_path, image)
+            # Draw and save results
+            self._save_annotated(image_path, image, tree_box, height_m, width_m, method)
             
-            logging.info(f"Results saved to {output_path}")
             logging.info(f"Calculation method: {method}")
             logging.info(f"Tree dimensions - Height: {height_m:.2f}m, Width: {width_m:.2f}m")
             
@@ -210,4 +476,46 @@ class TreeDimensionCalculator:
             
         except Exception as e:
             logging.error(f"Error calculating tree dimensions: {str(e)}")
-            return None, None 
\ No newline at end of file
+            return None, None 
+
+# Calculator owned by each calculate_many worker process
+_worker_calculator = None
+
+def _init_worker():
+    """Create one calculator per worker process, its cascades load once and stay cached"""
+    global _worker_calculator
+    _worker_calculator = TreeDimensionCalculator()
+    # Processes already run in parallel, avoid oversubscribing cores with OpenCV threads
+    cv2.setNumThreads(1)
+    # Worker processes exit without running atexit, flush pending writes on shutdown
+    multiprocessing.util.Finalize(None, _IO_POOL.shutdown, kwargs={'wait': True}, exitpriority=10)
+
+def _calculate_in_worker(image_path):
+    return _worker_calculator.calculate_tree_dimensions(image_path)
+
+def calculate_many(image_paths, max_workers=None):
+    """
+    Calculate tree dimensions for many images in parallel processes.
+
+    Workers are spawned, so scripts calling this must guard their entry
+    point with ``if __name__ == '__main__':``.
+
+    Args:
+        image_paths (list): Paths to the image files
+        max_workers (int): Number of worker processes (defaults to the CPU count)
+
+    Returns:
+        list: (height_m, width_m) for each image, in input order
+    """
+    image_paths = list(image_paths)
+    if not image_paths:
+        return []
+    
+    max_workers = max_workers or os.cpu_count() or 1
+    # A few chunks per worker keeps IPC low while still balancing the load
+    chunksize = max(1, len(image_paths) // (4 * max_workers))
+    # Spawned workers start clean instead of forking the parent's threads and OpenCV state
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                             initializer=_init_worker) as executor:
+        return list(executor.map(_calculate_in_worker, image_paths, chunksize=chunksize))
@@ -1,7 +1,15 @@
+import os
+import sys
 import cv2
 import numpy as np
 from datetime import datetime
 
+def _has_display():
+    """Whether OpenCV windows can be shown, Linux needs an X11 or Wayland session"""
+    if not sys.platform.startswith('linux'):
+        return True
+    return bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
 class TreeAnalysisUI:
     def __init__(self):
         self.results = []
@@ -64,17 +72,20 @@ class TreeAnalysisUI:
 
         # Store and display the summary image
         self.summary_image = summary_image
+        if not _has_display():
+            return
         cv2.namedWindow(self.summary_window, cv2.WINDOW_NORMAL)
         cv2.imshow(self.summary_window, summary_image)
 
     def wait_for_close(self):
         """Wait for user to close the windows"""
+        if not _has_display():
+            return
         print("\nPress 'q' to close all windows and exit...")
-        while True:
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord('q'):
-                cv2.destroyAllWindows()
-                break
+        # Block until a key is pressed instead of polling every millisecond
+        while cv2.waitKey(0) & 0xFF != ord('q'):
+            pass
+        cv2.destroyAllWindows()
 
 # Create a global instance of the UI
 ui = TreeAnalysisUI()
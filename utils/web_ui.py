@@ -8,84 +8,208 @@ handling image serving, and exporting data to Excel.
 Dependencies:
     - Flask: Web framework
     - pandas: Data manipulation and Excel export
-    - openpyxl: Excel file handling
+    - xlsxwriter: Excel file writing
+    - orjson: JSON serialization for the API endpoints
+    - waitress (optional): Production WSGI server
+    - flask-compress (optional): Brotli/gzip response compression
 """
 
-from flask import Flask, render_template, request, send_file, redirect, url_for, send_from_directory, jsonify
+from flask import Flask, render_template, request, send_file, redirect, url_for, send_from_directory, g
 import os
 from datetime import datetime
+import numpy as np
 import pandas as pd
-from io import BytesIO
-from .database import Database
+import xlsxwriter
+import orjson
+from jinja2 import FileSystemBytecodeCache
+from tempfile import SpooledTemporaryFile
+from .database import Database, TREE_COLUMNS
 import logging
 import math
+import functools
+import hashlib
+import queue
+
+try:
+    from waitress import serve
+except Exception:
+    serve = None
+
+try:
+    from flask_compress import Compress
+except Exception:
+    Compress = None
 
 # Set up image directory path
 TREE_IMAGES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tree_images'))
 
-# Initialize Flask app
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Exports up to this size are built in memory, larger ones spill to a temp file
+EXPORT_SPOOL_SIZE = 8 * 1024 * 1024
+
+# Browsers may reuse a served tree image for a day before revalidating
+IMAGE_MAX_AGE = 86400
+
+# Initialize Flask app; images are served by serve_image, not a static folder
 app = Flask(__name__, 
            template_folder=os.path.join(os.path.dirname(__file__), '..', 'templates'),
-           static_folder=TREE_IMAGES_DIR,
-           static_url_path='/images')
+           static_folder=None)
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = IMAGE_MAX_AGE
+
+# Behind Apache (mod_xsendfile) or lighttpd, let the front-end server send
+# image bytes itself; only the X-Sendfile header leaves the Python process
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+
+# Templates don't change while the app runs: skip the per-render mtime check
+# and keep compiled templates in the temp directory across restarts
+app.config['TEMPLATES_AUTO_RELOAD'] = False
+app.jinja_env.auto_reload = False
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache()
+
+# Compress JSON and HTML; images and the xlsx export are already compressed
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIMETYPES'] = ['application/json', 'text/html']
+app.config['COMPRESS_BR_LEVEL'] = 4
+if Compress is not None:
+    Compress(app)
+
+def ojsonify(obj, status=200):
+    """
+    JSON response serialized with orjson instead of the stdlib encoder.
+    
+    Args:
+        obj: Data to serialize; numpy values and datetimes are supported
+        status (int): HTTP status code
+        
+    Returns:
+        Response: application/json response
+    """
+    return app.response_class(
+        orjson.dumps(obj, option=orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY),
+        status=status,
+        mimetype='application/json'
+    )
+
+# Idle database connections kept open between requests
+DB_POOL_SIZE = 8
+
+# Worker threads of the waitress server, one pooled connection each
+WEB_THREADS = DB_POOL_SIZE
+_DB_POOL = queue.LifoQueue(maxsize=DB_POOL_SIZE)
+
+def get_db():
+    """
+    Database connection for the current request, checked out of the pool.
+    
+    Connections are opened on demand and reused by later requests, so the
+    connection setup and pragmas are not repeated on every request.
+    
+    Returns:
+        Database: Database instance returned to the pool when the request ends
+    """
+    if 'db' not in g:
+        try:
+            g.db = _DB_POOL.get_nowait()
+        except queue.Empty:
+            g.db = Database(check_same_thread=False)
+    return g.db
+
+@app.teardown_appcontext
+def close_db(exception):
+    """Return the request's database connection to the pool, if one was used."""
+    db = g.pop('db', None)
+    if db is None or db.conn is None:
+        return
+    # Never hand a half-finished transaction to the next request
+    if db.conn.in_transaction:
+        db.conn.rollback()
+    try:
+        _DB_POOL.put_nowait(db)
+    except queue.Full:
+        db.close()
+
+@functools.lru_cache(maxsize=1)
+def _trees_df(data_version):
+    """
+    All tree records as a DataFrame, rebuilt only when the database changes.
+    
+    Args:
+        data_version: Value of get_db().data_version(), used as the cache key
+        
+    Returns:
+        pd.DataFrame: One row per tree with TREE_COLUMNS as columns
+    """
+    rows = get_db().get_all_trees()
+    # Columns are named by the query itself, so they can't drift from the schema
+    return pd.DataFrame(rows, columns=rows[0].keys() if rows else TREE_COLUMNS)
+
+def _to_records(df):
+    """DataFrame rows as dicts, with missing values as None so they serialize to null"""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+def _to_columns(df):
+    """
+    DataFrame as {column: values}, serialized column by column.
+    
+    Numeric columns stay contiguous numpy arrays, which orjson reads straight
+    from the buffer (NaN becomes null); other columns become lists.
+    """
+    columns = {}
+    for name, values in df.items():
+        if pd.api.types.is_numeric_dtype(values.dtype):
+            columns[name] = np.ascontiguousarray(values.to_numpy())
+        else:
+            columns[name] = values.astype(object).where(values.notna(), None).tolist()
+    return columns
+
+def _trees_records():
+    """Tree records as template-ready dicts, with missing values as None"""
+    return _to_records(_trees_df(get_db().data_version()))
 
-# Initialize database
-db = Database()
+def _conditional_json(build_payload):
+    """
+    JSON response tagged with the database version as its ETag.
+    
+    When the client already holds the current version, a 304 is returned
+    without building or serializing the payload.
+    
+    Args:
+        build_payload (callable): Returns the data to serialize
+        
+    Returns:
+        Response: 200 JSON response, or an empty 304 response
+    """
+    etag = hashlib.blake2b(repr(get_db().data_version()).encode(), digest_size=8).hexdigest()
+    # flask-compress tags compressed responses as "<etag>:<encoding>"
+    if request.if_none_match.star_tag or any(
+            tag.split(':', 1)[0] == etag for tag in request.if_none_match):
+        response = app.response_class(status=304)
+    else:
+        response = ojsonify(build_payload())
+    response.set_etag(etag)
+    return response
+
+# Fields the map popups show; everything else stays off the wire
+MARKER_COLUMNS = [
+    'id', 'latitude', 'longitude', 'tree_type', 'type_confidence', 'height_m',
+    'width_m', 'measurement_method', 'measurement_confidence', 'altitude', 'image_path'
+]
 
 @app.route('/')
 def index():
     """Render the main page with tree data table."""
     try:
-        trees = db.get_all_trees()
-        tree_data = []
-        
-        for tree in trees:
-            tree_info = {
-                'id': tree[0],
-                'image_path': tree[1],
-                'tree_type': tree[2],
-                'type_confidence': tree[3],
-                'height_m': tree[4],
-                'width_m': tree[5],
-                'measurement_method': tree[6],
-                'measurement_confidence': tree[7],
-                'latitude': tree[8],
-                'longitude': tree[9],
-                'altitude': tree[10],
-                'timestamp': tree[11]
-            }
-            tree_data.append(tree_info)
-            
-        return render_template('index.html', trees=tree_data)
+        return render_template('index.html', trees=_trees_records())
     except Exception as e:
         logging.error(f"Error rendering index page: {str(e)}")
         return render_template('error.html', error=str(e))
 
 @app.route('/map')
 def map_view():
-    """Render the map view with tree locations."""
+    """Render the map view; markers are loaded from /api/markers."""
     try:
-        trees = db.get_all_trees()
-        tree_data = []
-        
-        for tree in trees:
-            tree_info = {
-                'id': tree[0],
-                'image_path': tree[1],
-                'tree_type': tree[2],
-                'type_confidence': tree[3],
-                'height_m': tree[4],
-                'width_m': tree[5],
-                'measurement_method': tree[6],
-                'measurement_confidence': tree[7],
-                'latitude': tree[8],
-                'longitude': tree[9],
-                'altitude': tree[10],
-                'timestamp': tree[11]
-            }
-            tree_data.append(tree_info)
-            
-        return render_template('map.html', trees=tree_data)
+        return render_template('map.html')
     except Exception as e:
         logging.error(f"Error rendering map view: {str(e)}")
         return render_template('error.html', error=str(e))
@@ -94,17 +218,68 @@ def map_view():
 def serve_image(filename):
     """Serve tree images."""
     try:
-        return send_from_directory(TREE_IMAGES_DIR, filename)
+        # Conditional responses answer revalidations with 304 and support ranges
+        response = send_from_directory(TREE_IMAGES_DIR, filename,
+                                       conditional=True, max_age=IMAGE_MAX_AGE)
+        # Images are the same for every user, so shared caches may keep them too.
+        # Not immutable: the driver rewrites *_analyzed.jpg under the same name
+        response.cache_control.public = True
+        return response
     except Exception as e:
         logging.error(f"Error serving image {filename}: {str(e)}")
         return '', 404
 
+# Excel number formats of the numeric export columns
+EXPORT_NUMBER_FORMATS = {
+    'Height (m)': '0.00',
+    'Width (m)': '0.00',
+    'Latitude': '0.000000',
+    'Longitude': '0.000000'
+}
+
+# Decimal places of those formats, applied to the CSV export as well
+EXPORT_DECIMALS = {
+    column: len(num_format.partition('.')[2])
+    for column, num_format in EXPORT_NUMBER_FORMATS.items()
+}
+
+# Fixed export column widths, wide enough for typical values, so the
+# export never has to scan every cell to size its columns
+EXPORT_COLUMN_WIDTHS = {
+    'ID': 6,
+    'Image Name': 40,
+    'Tree Type': 36,
+    'Height (m)': 12,
+    'Width (m)': 12,
+    'Latitude': 14,
+    'Longitude': 14,
+    'Processed Date': 20
+}
+
+def _numeric(values, blank_zero=False):
+    """Coerce a column to numbers, missing (and optionally zero) values become NaN"""
+    numbers = pd.to_numeric(values, errors='coerce')
+    return numbers.where(numbers != 0) if blank_zero else numbers
+
+def _export_response(output, mimetype, filename):
+    """Send an export as a download that is never served from a cache"""
+    response = send_file(output, mimetype=mimetype, as_attachment=True,
+                         download_name=filename, max_age=0)
+    # The format depends on the Accept header and the data changes between calls
+    response.vary.add('Accept')
+    response.cache_control.no_store = True
+    return response
+
 @app.route('/export')
 def export_to_excel():
     """
     Export tree analysis data to an Excel file.
     
-    The exported Excel file includes:
+    A plain CSV file is returned instead for ``?fmt=csv`` or when the client
+    prefers text/csv in its Accept header; it skips the XML and ZIP encoding
+    of xlsx entirely.
+    
+    The exported file includes:
     - Tree ID (sequential)
     - Image name
     - Tree type
@@ -113,56 +288,57 @@ def export_to_excel():
     - Processing date
     
     Returns:
-        Response: Excel file with tree analysis data
+        Response: Excel (or CSV) file with tree analysis data
     """
     try:
         # Get all trees from database
-        results = db.get_all_trees()
+        df = _trees_df(get_db().data_version())
         
-        # Create a DataFrame
-        data = []
-        for i, result in enumerate(results, start=1):
-            # Extract filename from image_path
-            image_name = os.path.basename(result[1])
-            data.append({
-                'ID': i,  # Use sequential ID starting from 1
-                'Image Name': image_name,
-                'Tree Type': result[2],
-                'Height (m)': f"{result[4]:.2f}",  # Format to 2 decimal places
-                'Width (m)': f"{result[5]:.2f}",   # Format to 2 decimal places
-                'Latitude': f"{result[8]:.6f}" if result[8] else "",
-                'Longitude': f"{result[9]:.6f}" if result[9] else "",
-                'Processed Date': result[11]
-            })
+        export = pd.DataFrame({
+            'ID': np.arange(1, len(df) + 1),  # Use sequential ID starting from 1
+            'Image Name': df['image_path'].str.replace(r'^.*[\\/]', '', regex=True),  # basename for / and \ paths
+            'Tree Type': df['tree_type'],
+            'Height (m)': _numeric(df['height_m']),
+            'Width (m)': _numeric(df['width_m']),
+            'Latitude': _numeric(df['latitude'], blank_zero=True),
+            'Longitude': _numeric(df['longitude'], blank_zero=True),
+            'Processed Date': df['timestamp']
+        })
         
-        df = pd.DataFrame(data)
+        # Generate filename with timestamp
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output = SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE)
         
-        # Create Excel writer
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Tree Analysis')
-            
-            # Auto-adjust column widths
-            worksheet = writer.sheets['Tree Analysis']
-            for idx, col in enumerate(df.columns):
-                max_length = max(
-                    df[col].astype(str).apply(len).max(),
-                    len(str(col))
-                )
-                worksheet.column_dimensions[chr(65 + idx)].width = max_length + 2
+        wants_csv = request.args.get('fmt') == 'csv' or \
+            request.accept_mimetypes.best_match([XLSX_MIMETYPE, 'text/csv']) == 'text/csv'
+        if wants_csv:
+            export.round(EXPORT_DECIMALS).to_csv(output, index=False, encoding='utf-8')
+            output.seek(0)
+            return _export_response(output, 'text/csv', f'tree_analysis_{timestamp}.csv')
         
-        output.seek(0)
+        # Stream rows with xlsxwriter; constant_memory flushes each row as it
+        # is finished, so cells must be written strictly row by row
+        workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+        worksheet = workbook.add_worksheet('Tree Analysis')
+        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
         
-        # Generate filename with timestamp
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'tree_analysis_{timestamp}.xlsx'
+        # Column widths and formats have to be set before any rows are written
+        for idx, column in enumerate(export.columns):
+            num_format = EXPORT_NUMBER_FORMATS.get(column)
+            cell_format = workbook.add_format({'num_format': num_format}) if num_format else None
+            worksheet.set_column(idx, idx, EXPORT_COLUMN_WIDTHS[column], cell_format)
+        
+        worksheet.write_row(0, 0, export.columns, header_format)
+        rows = export.astype(object).where(export.notna(), None)
+        # Bound once, this loop runs for every exported row
+        write_row = worksheet.write_row
+        for row_idx, row in enumerate(rows.itertuples(index=False), start=1):
+            write_row(row_idx, 0, row)
+        workbook.close()
         
-        return send_file(
-            output,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=filename
-        )
+        output.seek(0)
+        
+        return _export_response(output, XLSX_MIMETYPE, f'tree_analysis_{timestamp}.xlsx')
     except Exception as e:
         logging.error(f"Error exporting to Excel: {str(e)}")
         return str(e), 500
@@ -180,56 +356,69 @@ def edit_tree(tree_id):
             longitude = float(request.form.get('longitude')) if request.form.get('longitude') else None
             
             # Update the tree in database
-            success = db.update_tree(tree_id, tree_type, height_m, width_m, latitude, longitude)
+            success = get_db().update_tree(tree_id, tree_type, height_m, width_m, latitude, longitude)
             
             if success:
-                return {'status': 'success'}
+                # Don't wait for the file timestamps to notice the change
+                _trees_df.cache_clear()
+                return ojsonify({'status': 'success'})
             else:
-                return {'status': 'error', 'message': 'Failed to update tree'}, 500
+                return ojsonify({'status': 'error', 'message': 'Failed to update tree'}, status=500)
         
         # GET request - show edit form
-        tree = db.get_tree_by_id(tree_id)
+        tree = get_db().get_tree_by_id(tree_id)
         if tree:
             return render_template('edit.html', tree=tree)
         else:
-            return {'error': 'Tree not found'}, 404
+            return ojsonify({'error': 'Tree not found'}, status=404)
     except Exception as e:
         logging.error(f"Error editing tree: {str(e)}")
-        return {'error': str(e)}, 500
+        return ojsonify({'error': str(e)}, status=500)
 
 @app.route('/api/trees')
 def get_trees():
-    """API endpoint to get tree data in JSON format."""
+    """API endpoint to get tree data in JSON format.
+    
+    Returns a list of tree objects, or with ``?orient=columns`` a single
+    object mapping each column name to its list of values.
+    """
     try:
-        trees = db.get_all_trees()
-        tree_data = []
-        
-        for tree in trees:
-            tree_info = {
-                'id': tree[0],
-                'image_path': tree[1],
-                'tree_type': tree[2],
-                'type_confidence': tree[3],
-                'height_m': tree[4],
-                'width_m': tree[5],
-                'measurement_method': tree[6],
-                'measurement_confidence': tree[7],
-                'latitude': tree[8],
-                'longitude': tree[9],
-                'altitude': tree[10],
-                'timestamp': tree[11]
-            }
-            tree_data.append(tree_info)
-            
-        return jsonify(tree_data)
+        if request.args.get('orient') == 'columns':
+            return _conditional_json(lambda: _to_columns(_trees_df(get_db().data_version())))
+        return _conditional_json(_trees_records)
     except Exception as e:
         logging.error(f"Error getting tree data: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        return ojsonify({'error': str(e)}, status=500)
+
+@app.route('/api/markers')
+def get_markers():
+    """API endpoint with the located trees shown as map markers."""
+    try:
+        def markers():
+            df = _trees_df(get_db().data_version())
+            # Same test the map used client-side: both coordinates set and non-zero
+            located = df['latitude'].fillna(0).ne(0) & df['longitude'].fillna(0).ne(0)
+            return _to_records(df.loc[located, MARKER_COLUMNS])
+        
+        return _conditional_json(markers)
+    except Exception as e:
+        logging.error(f"Error getting map markers: {str(e)}")
+        return ojsonify({'error': str(e)}, status=500)
 
 def start_web_interface():
-    """Start the Flask web interface."""
+    """Start the Flask web interface.
+    
+    Requests are served by waitress's thread pool when it is installed,
+    falling back to Flask's development server otherwise.
+    """
     try:
-        app.run(host='0.0.0.0', port=5000)
+        if serve is not None:
+            # HTTP/1.1 connections stay open between requests by default;
+            # without an ident waitress leaves out the Server header
+            serve(app, host='0.0.0.0', port=5000, threads=WEB_THREADS, ident=None)
+        else:
+            logging.warning("waitress is not installed, using the Flask development server")
+            app.run(host='0.0.0.0', port=5000, threaded=True)
     except Exception as e:
         logging.error(f"Error starting web interface: {str(e)}")
         raise 
\ No newline at end of file
@@ -0,0 +1,12 @@
+"""
+WSGI entry point for running the web interface under a production server.
+
+Example:
+    waitress-serve --host=0.0.0.0 --port=5000 --threads=8 --ident= wsgi:app
+"""
+
+from utils.web_ui import app
+
+if __name__ == '__main__':
+    from utils.web_ui import start_web_interface
+    start_web_interface()